@@ -1,19 +1,28 @@
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_restful import Api, Resource, marshal
 from werkzeug.exceptions import HTTPException, default_exceptions
 
+from app.conditional import cache_headers, not_modified
 from app.database import db
+from app.endpoints.analytics.resource import SnapshotQueryResource, SnapshotResource
+from app.endpoints.analytics.snapshot import SnapshotError, build_snapshot
 from app.endpoints.profiles.resource import ProfileResources
+from app.endpoints.projects.dedup import recent_keys
 from app.endpoints.projects.model import Project
 from app.endpoints.projects.resource import (
+    ProjectDataBatchResources,
     ProjectDataResources,
     ProjectNoteResources,
+    ProjectNoteSearchResource,
     ProjectResources,
+    ProjectStatsResource,
     ProjectStatusResource,
     project_home_fields,
 )
+from app.endpoints.projects.search import init_note_index
 from config import Config
 
 app = Flask(__name__)
@@ -35,14 +44,21 @@ for ex in default_exceptions:
 app.config["SQLALCHEMY_DATABASE_URI"] = Config.SQLALCHEMY_DATABASE_URI
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = Config.SQLALCHEMY_TRACK_MODIFICATIONS
 app.config["BUNDLE_ERRORS"] = Config.BUNDLE_ERRORS
+app.config["STATS_EWMA_HOUR_TAU"] = Config.STATS_EWMA_HOUR_TAU
+app.config["STATS_EWMA_DAY_TAU"] = Config.STATS_EWMA_DAY_TAU
+app.config["STATS_THRESHOLDS"] = Config.STATS_THRESHOLDS
+app.config["DEDUP_WINDOW_SIZE"] = Config.DEDUP_WINDOW_SIZE
+app.config["SNAPSHOT_DIR"] = Config.SNAPSHOT_DIR
 
 db.init_app(app)
 migrate.init_app(app, db)
+recent_keys.init_app(app)
 api = Api(app)
 api.prefix = "/api"
 
 with app.app_context():
     db.create_all()
+    app.config["NOTES_FTS"] = init_note_index()
 
 
 class HomePage(Resource):
@@ -50,8 +66,17 @@ class HomePage(Resource):
     def get():
         projects = Project.query.filter_by(**{}).order_by(Project.name)
         projects = projects.limit(3)
+
+        headers = cache_headers(
+            projects.with_entities(Project.id, Project.updated).all(),
+            last_modified=False,
+        )
+        cached = not_modified(headers)
+        if cached:
+            return cached
+
         project = projects.all()
-        return marshal(project, project_home_fields)
+        return marshal(project, project_home_fields), 200, headers
 
 
 api.add_resource(HomePage, "/")
@@ -59,9 +84,28 @@ api.add_resource(ProjectResources, "/projects", "/projects/<int:project_id>")
 api.add_resource(
     ProjectStatusResource, "/projects", "/projects/<int:project_id>/status"
 )
+api.add_resource(ProjectStatsResource, "/projects/<int:project_id>/stats")
+api.add_resource(ProjectDataBatchResources, "/data/batch")
 api.add_resource(ProjectDataResources, "/data", "/data/<int:sensor_id>")
-api.add_resource(ProjectNoteResources, "/notes", "/data/<int:note_id>")
+api.add_resource(ProjectNoteSearchResource, "/notes/search")
+api.add_resource(ProjectNoteResources, "/notes", "/notes/<int:note_id>")
 api.add_resource(ProfileResources, "/profiles", "/profiles/<int:profile_id>")
+api.add_resource(SnapshotResource, "/analytics/snapshot")
+api.add_resource(SnapshotQueryResource, "/analytics/query")
+
+
+@app.cli.command("snapshot")
+def snapshot_command():
+    """Export new sensor readings to the columnar snapshot."""
+    try:
+        manifest = build_snapshot(app.config["SNAPSHOT_DIR"])
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(
+        f"Exported {manifest['exported']} readings "
+        f"(last id {manifest['last_id']}) to {app.config['SNAPSHOT_DIR']}"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,450 @@
+import asyncio
+import json
+import re
+
+from flask_restful import inputs, marshal
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app import app as flask_app
+from app.database import utcnow
+from app.endpoints.profiles.model import Color, Profile
+from app.endpoints.projects.dedup import (
+    reading_key,
+    recent_keys,
+    stored_keys,
+    utc_naive,
+)
+from app.endpoints.projects.model import Project, ProjectData
+from app.endpoints.projects.resource import project_active, sensor_fields
+from app.endpoints.projects.stats import apply_stats
+from config import Config
+
+DUPLICATE: dict = {"message": "Duplicate reading", "duplicate": True}
+STREAM_KEEPALIVE = 15
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_reading(payload, project_id=None, idempotency_key=None) -> dict:
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Each reading must be a JSON object")
+
+    if not isinstance(payload.get("sensor_data"), str):
+        raise RequestError(400, "The sensor_data parameter is required")
+
+    try:
+        json.loads(payload["sensor_data"])
+    except ValueError:
+        raise RequestError(400, "The sensor_data parameter must be a JSON string")
+
+    try:
+        project_id = int(payload.get("project_id", project_id))
+        reading_time = payload.get("reading_time")
+        if reading_time is not None:
+            reading_time = utc_naive(inputs.datetime_from_iso8601(reading_time))
+        sequence = payload.get("sequence")
+        if sequence is not None:
+            sequence = int(sequence)
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"Invalid reading: {str(e)}")
+
+    idempotency_key = payload.get("idempotency_key", idempotency_key)
+    return {
+        "project_id": project_id,
+        "sensor_data": payload["sensor_data"],
+        "reading_time": reading_time,
+        "sequence": sequence,
+        "idempotency_key": idempotency_key,
+        "key": reading_key(project_id, idempotency_key, reading_time, sequence),
+    }
+
+
+class ReadingWriter:
+    # The only task that writes readings. Everything queued while a commit is
+    # in flight goes out in the next transaction, so a burst of controllers
+    # costs one SQLite commit instead of one per request.
+    def __init__(self, sessionmaker, config, batch_size: int):
+        self.sessionmaker = sessionmaker
+        self.config = config
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers: dict = {}
+
+    async def submit(self, readings: list) -> list:
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in readings]
+        for reading, future in zip(readings, futures):
+            self.queue.put_nowait((reading, future))
+        return await asyncio.gather(*futures)
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self.subscribers.setdefault(project_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue) -> None:
+        self.subscribers.get(project_id, set()).discard(queue)
+
+    async def run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            readings = [reading for reading, _ in batch]
+            try:
+                results = await self.write(readings)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for reading, (_, future), sensor in zip(readings, batch, results):
+                    if reading["key"]:
+                        recent_keys.add(reading["key"])
+                    if future.done():
+                        continue
+
+                    # Marshalled per reading, after the commit, so one bad
+                    # reading only fails its own request.
+                    try:
+                        result = (
+                            marshal(sensor, sensor_fields)
+                            if sensor is not None
+                            else None
+                        )
+                    except Exception as e:
+                        future.set_exception(e)
+                        continue
+
+                    if result is not None:
+                        self.publish(reading["project_id"], result)
+                    future.set_result(result)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def write(self, readings: list) -> list:
+        async with self.sessionmaker() as session:
+            try:
+                results = await session.run_sync(self.store, readings)
+                await session.commit()
+                return results
+            except IntegrityError:
+                await session.rollback()
+
+            # Another process stored one of these keys after our lookup, so
+            # fall back to one transaction per reading to isolate it.
+            results = []
+            for reading in readings:
+                try:
+                    results.extend(await session.run_sync(self.store, [reading]))
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()
+                    results.append(None)
+            return results
+
+    def store(self, session, readings: list) -> list:
+        sensors: list = [None] * len(readings)
+        by_project: dict = {}
+        for index, reading in enumerate(readings):
+            by_project.setdefault(reading["project_id"], []).append(index)
+
+        # created_date is set here rather than by the server default so the
+        # response can be marshalled without reloading the row.
+        now = utcnow()
+        for project_id, indexes in by_project.items():
+            keys = [readings[i]["key"] for i in indexes if readings[i]["key"]]
+            stored = stored_keys(session, project_id, keys)
+
+            new_sensors: list = []
+            for index in indexes:
+                reading = readings[index]
+                if reading["key"]:
+                    if reading["key"] in stored:
+                        continue
+                    stored.add(reading["key"])
+
+                sensor = ProjectData(
+                    created_date=now,
+                    sensor_data=reading["sensor_data"],
+                    reading_time=reading["reading_time"],
+                    sequence=reading["sequence"],
+                    idempotency_key=reading["idempotency_key"],
+                    project_id=project_id,
+                )
+                sensors[index] = sensor
+                new_sensors.append(sensor)
+
+            session.add_all(new_sensors)
+            apply_stats(session, self.config, project_id, new_sensors)
+
+        session.flush()
+        return sensors
+
+    def publish(self, project_id: int, reading: dict) -> None:
+        for queue in self.subscribers.get(project_id, ()):
+            try:
+                queue.put_nowait(reading)
+            except asyncio.QueueFull:
+                pass
+
+
+class IngestServer:
+    # ASGI entry point for the always-connected controller traffic: ingest,
+    # status and a server-sent event stream of new readings. Every other route
+    # stays on the Flask app.
+    def __init__(self, database_uri: str, config, batch_size: int):
+        self.database_uri = database_uri
+        self.config = config
+        self.batch_size = batch_size
+        # Built in startup(), once the server's event loop is running.
+        self.engine: AsyncEngine | None = None
+        self.sessionmaker: async_sessionmaker[AsyncSession] | None = None
+        self.writer: ReadingWriter | None = None
+        self.writer_task: asyncio.Task | None = None
+        self.routes: list = [
+            ("POST", re.compile(r"^/api/data$"), self.post_data),
+            ("POST", re.compile(r"^/api/data/batch$"), self.post_batch),
+            ("GET", re.compile(r"^/api/projects/(\d+)/status$"), self.get_status),
+            ("GET", re.compile(r"^/api/projects/(\d+)/stream$"), self.get_stream),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.dispatch(scope, receive, send)
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self) -> None:
+        self.engine = create_async_engine(self.database_uri)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.writer = ReadingWriter(self.sessionmaker, self.config, self.batch_size)
+        self.writer_task = asyncio.create_task(self.writer.run())
+
+    async def shutdown(self) -> None:
+        assert self.writer and self.writer_task and self.engine
+        await self.writer.queue.join()
+        self.writer_task.cancel()
+        await self.engine.dispose()
+
+    async def dispatch(self, scope, receive, send) -> None:
+        for method, pattern, handler in self.routes:
+            match = pattern.match(scope["path"])
+            if match and scope["method"] == method:
+                started = False
+
+                async def tracked_send(message) -> None:
+                    nonlocal started
+                    started = started or message["type"] == "http.response.start"
+                    await send(message)
+
+                try:
+                    await handler(
+                        scope, receive, tracked_send, *map(int, match.groups())
+                    )
+                except Exception as e:
+                    # Once a response has started there is no status left to
+                    # send, so let the server close the connection.
+                    if started:
+                        raise
+                    if isinstance(e, RequestError):
+                        await send_json(send, e.status, {"message": e.message})
+                    else:
+                        await send_json(send, 500, {"message": str(e)})
+                return
+
+        await send_json(send, 404, {"message": "Not served by the ingest server"})
+
+    async def post_data(self, scope, receive, send) -> None:
+        payload = await read_json(receive)
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(b"idempotency-key")
+        reading = parse_reading(
+            payload, idempotency_key=idempotency_key and idempotency_key.decode()
+        )
+
+        if reading["key"] and reading["key"] in recent_keys:
+            await send_json(send, 200, DUPLICATE)
+            return
+
+        assert self.writer
+        (result,) = await self.writer.submit([reading])
+        await send_json(send, 200, result if result is not None else DUPLICATE)
+
+    async def post_batch(self, scope, receive, send) -> None:
+        payload = await read_json(receive)
+        if not isinstance(payload, dict) or not isinstance(
+            payload.get("readings"), list
+        ):
+            raise RequestError(
+                400, "The readings parameter must be a list of sensor_data objects"
+            )
+
+        try:
+            project_id = int(payload["project_id"])
+        except (KeyError, TypeError, ValueError):
+            raise RequestError(400, "The project_id parameter is required")
+
+        assert self.sessionmaker and self.writer
+        async with self.sessionmaker() as session:
+            if await session.get(Project, project_id) is None:
+                raise RequestError(404, f"Project {project_id} not found")
+
+        readings: list = []
+        indexes: list = []
+        duplicates: list = []
+        for index, item in enumerate(payload["readings"]):
+            if isinstance(item, dict):
+                item = {**item, "project_id": project_id}
+            reading = parse_reading(item)
+            if reading["key"] and reading["key"] in recent_keys:
+                duplicates.append(index)
+            else:
+                readings.append(reading)
+                indexes.append(index)
+
+        results = await self.writer.submit(readings)
+        inserted: list = []
+        for index, result in zip(indexes, results):
+            if result is None:
+                duplicates.append(index)
+            else:
+                inserted.append(result)
+
+        await send_json(
+            send, 201, {"inserted": inserted, "duplicates": sorted(duplicates)}
+        )
+
+    async def get_status(self, scope, receive, send, project_id: int) -> None:
+        assert self.sessionmaker
+        async with self.sessionmaker() as session:
+            project = await session.get(Project, project_id)
+            if project is None:
+                raise RequestError(404, f"Project {project_id} not found")
+
+            colors = None
+            if project.profile_id is not None:
+                profile = await session.get(Profile, project.profile_id)
+                if profile is not None:
+                    colors = await profile_colors(session, profile)
+
+        await send_json(
+            send, 200, {"status": project_active(project), "colors": colors}
+        )
+
+    async def get_stream(self, scope, receive, send, project_id: int) -> None:
+        assert self.sessionmaker and self.writer
+        async with self.sessionmaker() as session:
+            if await session.get(Project, project_id) is None:
+                raise RequestError(404, f"Project {project_id} not found")
+
+        queue = self.writer.subscribe(project_id)
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache"),
+                    ],
+                }
+            )
+            while not disconnected.done():
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    {getter, disconnected},
+                    timeout=STREAM_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter.done():
+                    event = f"data: {json.dumps(getter.result())}\n\n"
+                else:
+                    getter.cancel()
+                    event = ": keepalive\n\n"
+                if not disconnected.done():
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": event.encode(),
+                            "more_body": True,
+                        }
+                    )
+        finally:
+            disconnected.cancel()
+            self.writer.unsubscribe(project_id, queue)
+
+
+async def profile_colors(session, profile: Profile) -> list:
+    # Same output as ColorField, without its per-color queries.
+    color_ids = json.loads(profile.colors)
+    colors = {
+        color.id: (color.color.r, color.color.g, color.color.b)
+        for color in await session.scalars(select(Color).where(Color.id.in_(color_ids)))
+    }
+    return [colors[color_id] for color_id in color_ids if color_id in colors]
+
+
+async def read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        raise RequestError(400, "The request body must be JSON")
+
+
+async def wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def send_json(send, status: int, payload) -> None:
+    body = json.dumps(payload).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+application = IngestServer(
+    Config.ASYNC_DATABASE_URI, flask_app.config, Config.ASYNC_WRITE_BATCH
+)
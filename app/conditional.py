@@ -0,0 +1,41 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.http import http_date, parse_date
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def cache_headers(versions: list, last_modified: bool = True) -> dict:
+    # versions are (id, updated, ...) rows from a lookup that loads no
+    # relationships, so validators cost one query and no serialization.
+    # Collections pass last_modified=False: a row leaving the collection
+    # changes the ETag but never advances the newest timestamp.
+    etag = hashlib.sha1(repr([tuple(row) for row in versions]).encode()).hexdigest()
+    headers: dict = {"ETag": f'"{etag}"'}
+
+    stamps = [value for row in versions for value in row if isinstance(value, datetime)]
+    if last_modified and stamps:
+        headers["Last-Modified"] = http_date(max(as_utc(stamp) for stamp in stamps))
+
+    return headers
+
+
+def not_modified(headers: dict) -> Response | None:
+    etag = headers["ETag"].strip('"')
+    if_modified_since = request.if_modified_since
+    last_modified = parse_date(headers.get("Last-Modified"))
+
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif if_modified_since and last_modified:
+        matched = last_modified <= if_modified_since
+    else:
+        matched = False
+
+    return Response(status=304, headers=headers) if matched else None
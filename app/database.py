@@ -1,3 +1,10 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+
+def utcnow() -> datetime:
+    # Naive UTC with microseconds, matching what func.now() stores in SQLite.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,71 @@
+from flask import current_app
+from flask_restful import Resource, abort, inputs, reqparse
+
+from app.endpoints.analytics.snapshot import (
+    AGGREGATES,
+    SnapshotError,
+    build_snapshot,
+    query_snapshot,
+)
+
+snapshot_query_parser = reqparse.RequestParser()
+snapshot_query_parser.add_argument(
+    "channel",
+    type=str,
+    required=True,
+    location=["args"],
+    help="The channel parameter is required",
+)
+snapshot_query_parser.add_argument(
+    "project_id", type=int, action="append", location=["args"]
+)
+snapshot_query_parser.add_argument(
+    "start", type=inputs.datetime_from_iso8601, location=["args"]
+)
+snapshot_query_parser.add_argument(
+    "end", type=inputs.datetime_from_iso8601, location=["args"]
+)
+snapshot_query_parser.add_argument("interval", type=inputs.positive, location=["args"])
+snapshot_query_parser.add_argument(
+    "agg", type=str, default="mean", choices=AGGREGATES, location=["args"]
+)
+
+
+class SnapshotResource(Resource):
+    @staticmethod
+    def post():
+        try:
+            manifest = build_snapshot(current_app.config["SNAPSHOT_DIR"])
+        except SnapshotError as e:
+            abort(501, message=str(e))
+
+        return {
+            "exported": manifest["exported"],
+            "last_id": manifest["last_id"],
+            "projects": {
+                project_id: {
+                    "rows": project["rows"],
+                    "channels": sorted(project["channels"]),
+                }
+                for project_id, project in manifest["projects"].items()
+            },
+        }
+
+
+class SnapshotQueryResource(Resource):
+    @staticmethod
+    def get():
+        args = snapshot_query_parser.parse_args()
+
+        try:
+            return query_snapshot(
+                current_app.config["SNAPSHOT_DIR"],
+                args.get("channel"),
+                project_ids=args.get("project_id"),
+                start=args.get("start"),
+                end=args.get("end"),
+                interval=args.get("interval"),
+                agg=args.get("agg"),
+            )
+        except SnapshotError as e:
+            abort(501, message=str(e))
@@ -0,0 +1,250 @@
+import json
+import os
+from datetime import datetime, timezone
+from threading import Lock
+
+from sqlalchemy import select
+
+from app.database import db
+from app.endpoints.projects.model import ProjectData
+from app.endpoints.projects.stats import sensor_channels
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+# Layout under the snapshot directory:
+#   manifest.json        last exported ProjectData.id and, per project, its row
+#                        count, channel file names and segments
+#   <project_id>/part_<first_id>/
+#       ids.npy          int64 ProjectData.id
+#       time.npy         int64 epoch seconds (reading_time, else created)
+#       channel_<n>.npy  float64 values, NaN where a row lacks the channel;
+#                        only for channels the segment's rows carry
+#
+# Each build appends new segments and never rewrites old ones, so it writes
+# only the rows it exports.
+
+BATCH_SIZE = 5000
+AGGREGATES = ("mean", "min", "max", "sum", "count")
+
+_build_lock = Lock()
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise SnapshotError("Sensor snapshots require numpy to be installed")
+
+
+def epoch(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, "manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"last_id": 0, "projects": {}}
+
+
+def write_manifest(directory: str, manifest: dict) -> None:
+    path = os.path.join(directory, "manifest.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def save_array(path: str, array) -> None:
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_snapshot(directory: str) -> dict:
+    require_numpy()
+    with _build_lock:
+        os.makedirs(directory, exist_ok=True)
+        manifest = read_manifest(directory)
+
+        rows = db.session.execute(
+            select(
+                ProjectData.id,
+                ProjectData.project_id,
+                ProjectData.created_date,
+                ProjectData.reading_time,
+                ProjectData.sensor_data,
+            )
+            .where(ProjectData.id > manifest["last_id"])
+            .order_by(ProjectData.id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+
+        exported = 0
+        for partition in rows.partitions():
+            chunks: dict = {}
+            for row_id, project_id, created, reading_time, sensor_data in partition:
+                chunk = chunks.setdefault(
+                    str(project_id), {"ids": [], "times": [], "channels": {}}
+                )
+                values = sensor_channels(sensor_data)
+                count = len(chunk["ids"])
+                for channel in values.keys() - chunk["channels"].keys():
+                    chunk["channels"][channel] = [np.nan] * count
+                for channel, column in chunk["channels"].items():
+                    column.append(values.get(channel, np.nan))
+                chunk["ids"].append(row_id)
+                chunk["times"].append(epoch(reading_time or created))
+
+            for project_id, chunk in chunks.items():
+                write_segment(directory, manifest, project_id, chunk)
+
+            # Written after the partition's segments, so an interrupted build
+            # resumes from the last complete partition. Segments it wrote past
+            # that are not in the manifest, and the next build overwrites them.
+            manifest["last_id"] = partition[-1][0]
+            write_manifest(directory, manifest)
+            exported += len(partition)
+
+        return {"exported": exported, **manifest}
+
+
+def write_segment(directory: str, manifest: dict, project_id: str, chunk: dict):
+    project = manifest["projects"].setdefault(
+        project_id, {"rows": 0, "channels": {}, "segments": []}
+    )
+    name = f"part_{chunk['ids'][0]}"
+    segment_dir = os.path.join(directory, project_id, name)
+    os.makedirs(segment_dir, exist_ok=True)
+
+    for channel in sorted(chunk["channels"].keys() - project["channels"].keys()):
+        project["channels"][channel] = f"channel_{len(project['channels'])}.npy"
+
+    save_array(
+        os.path.join(segment_dir, "ids.npy"), np.asarray(chunk["ids"], dtype=np.int64)
+    )
+    save_array(
+        os.path.join(segment_dir, "time.npy"),
+        np.asarray(chunk["times"], dtype=np.int64),
+    )
+    for channel, column in chunk["channels"].items():
+        save_array(
+            os.path.join(segment_dir, project["channels"][channel]),
+            np.asarray(column, dtype=np.float64),
+        )
+
+    project["segments"].append(
+        {"name": name, "rows": len(chunk["ids"]), "channels": sorted(chunk["channels"])}
+    )
+    project["rows"] += len(chunk["ids"])
+
+
+def load_channel(directory: str, manifest: dict, project_id: str, channel: str):
+    project = manifest["projects"].get(project_id)
+    if project is None or channel not in project["channels"]:
+        return None
+
+    times: list = []
+    values: list = []
+    for segment in project["segments"]:
+        # A segment without the channel would be all NaN, which queries drop.
+        if channel not in segment["channels"]:
+            continue
+
+        segment_dir = os.path.join(directory, project_id, segment["name"])
+        times.append(np.load(os.path.join(segment_dir, "time.npy"), mmap_mode="r"))
+        values.append(
+            np.load(
+                os.path.join(segment_dir, project["channels"][channel]), mmap_mode="r"
+            )
+        )
+    return np.concatenate(times), np.concatenate(values)
+
+
+def aggregate(times, values, interval: int | None, agg: str) -> tuple:
+    if not interval:
+        order = np.argsort(times, kind="stable")
+        return times[order], values[order]
+
+    buckets = times // interval * interval
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(keys))
+
+    result: np.ndarray
+    if agg == "count":
+        result = counts.astype(np.float64)
+    elif agg == "sum":
+        result = np.bincount(inverse, weights=values, minlength=len(keys))
+    elif agg == "mean":
+        result = np.bincount(inverse, weights=values, minlength=len(keys)) / counts
+    elif agg == "min":
+        result = np.full(len(keys), np.inf)
+        np.minimum.at(result, inverse, values)
+    else:
+        result = np.full(len(keys), -np.inf)
+        np.maximum.at(result, inverse, values)
+
+    return keys, result
+
+
+def query_snapshot(
+    directory: str,
+    channel: str,
+    project_ids: list | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    interval: int | None = None,
+    agg: str = "mean",
+) -> dict:
+    require_numpy()
+    if agg not in AGGREGATES:
+        raise SnapshotError(f"agg must be one of: {', '.join(AGGREGATES)}")
+
+    manifest = read_manifest(directory)
+    if project_ids is None:
+        project_ids = list(manifest["projects"])
+
+    series: dict = {}
+    selected: list = []
+    for project_id in map(str, project_ids):
+        loaded = load_channel(directory, manifest, project_id, channel)
+        if loaded is None:
+            continue
+
+        times, values = loaded
+        mask = ~np.isnan(values)
+        if start is not None:
+            mask &= times >= epoch(start)
+        if end is not None:
+            mask &= times < epoch(end)
+
+        times, values = times[mask], values[mask]
+        selected.append((times, values))
+        keys, result = aggregate(times, values, interval, agg)
+        series[project_id] = {"times": keys.tolist(), "values": result.tolist()}
+
+    response: dict = {
+        "channel": channel,
+        "interval": interval,
+        "agg": agg,
+        "last_id": manifest["last_id"],
+        "projects": series,
+    }
+
+    if interval and selected:
+        keys, result = aggregate(
+            np.concatenate([times for times, _ in selected]),
+            np.concatenate([values for _, values in selected]),
+            interval,
+            agg,
+        )
+        response["combined"] = {"times": keys.tolist(), "values": result.tolist()}
+
+    return response
@@ -4,7 +4,7 @@ from datetime import datetime
 from sqlalchemy import DateTime, String, func
 from sqlalchemy.orm import Mapped, composite, mapped_column
 
-from app.database import db
+from app.database import db, utcnow
 
 
 @dataclasses.dataclass
@@ -34,7 +34,7 @@ class Profile(db.Model):
         DateTime(timezone=True), server_default=func.now()
     )
     updated_date: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=utcnow
     )
     name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     colors: Mapped[str] = mapped_column(String)
@@ -1,5 +1,6 @@
 import json
 
+from flask import Response
 from flask_restful import (
     Resource,
     abort,
@@ -11,6 +12,7 @@ from flask_restful import (
 )
 
 from app import db
+from app.conditional import cache_headers, not_modified
 from app.endpoints.profiles.model import Color, Profile, RgbColor
 
 
@@ -48,12 +50,25 @@ profile_post_parser.add_argument(
 profile_post_parser.add_argument("colors")
 
 
+def profile_versions(profiles) -> list:
+    return profiles.with_entities(Profile.id, Profile.updated_date).all()
+
+
 class ProfileResources(Resource):
     @staticmethod
-    def get(profile_id=None) -> dict:
+    def get(profile_id=None) -> Response | tuple:
         if profile_id:
+            versions = profile_versions(Profile.query.filter_by(id=profile_id))
+            if not versions:
+                abort(404)
+
+            headers = cache_headers(versions)
+            cached = not_modified(headers)
+            if cached:
+                return cached
+
             project = Profile.query.get_or_404(profile_id)
-            return marshal(project, profile_fields)
+            return marshal(project, profile_fields), 200, headers
         else:
             args = request.args.to_dict()
             limit = args.get("limit", 0)
@@ -70,9 +85,14 @@ class ProfileResources(Resource):
             if offset:
                 profiles = profiles.offset(offset)
 
+            headers = cache_headers(profile_versions(profiles), last_modified=False)
+            cached = not_modified(headers)
+            if cached:
+                return cached
+
             profile = profiles.all()
 
-            return marshal(profile, profile_list_fields)
+            return marshal(profile, profile_list_fields), 200, headers
 
     @marshal_with(profile_fields)
     def post(self) -> Profile:
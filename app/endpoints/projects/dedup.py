@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+
+from sqlalchemy import or_, select, tuple_
+
+from app.endpoints.projects.model import ProjectData
+
+
+class RecentKeys:
+    # Bounded LRU of reading keys already stored by this worker, so controller
+    # retries are turned away without a round trip to the database.
+    def __init__(self, size: int = 0):
+        self.size = size
+        self._keys: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app) -> None:
+        self.size = app.config["DEDUP_WINDOW_SIZE"]
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            return False
+
+    def add(self, key) -> None:
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            if len(self._keys) > self.size:
+                self._keys.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+recent_keys = RecentKeys()
+
+
+def utc_naive(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def reading_key(
+    project_id: int,
+    idempotency_key: str | None,
+    reading_time: datetime | None,
+    sequence: int | None,
+) -> tuple | None:
+    if idempotency_key:
+        return project_id, "key", idempotency_key
+    if reading_time is not None and sequence is not None:
+        return project_id, "seq", reading_time, sequence
+    return None
+
+
+def stored_keys(session, project_id: int, keys: list) -> set:
+    idempotency_keys = [key[2] for key in keys if key[1] == "key"]
+    sequences = [(key[2], key[3]) for key in keys if key[1] == "seq"]
+
+    conditions: list = []
+    if idempotency_keys:
+        conditions.append(ProjectData.idempotency_key.in_(idempotency_keys))
+    if sequences:
+        conditions.append(
+            tuple_(ProjectData.reading_time, ProjectData.sequence).in_(sequences)
+        )
+    if not conditions:
+        return set()
+
+    rows = session.execute(
+        select(
+            ProjectData.idempotency_key,
+            ProjectData.reading_time,
+            ProjectData.sequence,
+        ).where(ProjectData.project_id == project_id, or_(*conditions))
+    )
+    # A row stored with both an idempotency key and a sequence matches a retry
+    # that identifies itself either way.
+    stored: set = set()
+    for idempotency_key, reading_time, sequence in rows:
+        for key in (
+            reading_key(project_id, idempotency_key, None, None),
+            reading_key(project_id, None, reading_time, sequence),
+        ):
+            if key:
+                stored.add(key)
+    return stored
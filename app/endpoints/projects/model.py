@@ -1,10 +1,22 @@
+import math
 from datetime import datetime
+from itertools import chain
 from typing import List
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DateTime,
+    Float,
+    ForeignKey,
+    String,
+    Text,
+    UniqueConstraint,
+    event,
+    func,
+    update,
+)
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
-from app.database import db
+from app.database import db, utcnow
 from app.endpoints.profiles.model import Profile
 
 
@@ -16,7 +28,7 @@ class Project(db.Model):
         DateTime(timezone=True), server_default=func.now()
     )
     updated: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=utcnow
     )
     name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     bed_id: Mapped[str] = mapped_column(String)
@@ -31,6 +43,9 @@ class Project(db.Model):
     notes: Mapped[List["ProjectNotes"]] = relationship(
         back_populates="project", cascade="all, delete"
     )
+    stats: Mapped[List["ProjectStats"]] = relationship(
+        back_populates="project", cascade="all, delete"
+    )
 
     def __repr__(self):
         return f"Project: {self.name}"
@@ -38,15 +53,26 @@ class Project(db.Model):
 
 class ProjectData(db.Model):
     __tablename__ = "project_data_table"
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id", "idempotency_key", name="uq_project_data_idempotency_key"
+        ),
+        UniqueConstraint(
+            "project_id", "reading_time", "sequence", name="uq_project_data_sequence"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     created_date: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
     updated_date: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=utcnow
     )
     sensor_data: Mapped[str] = mapped_column(String)
+    reading_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    sequence: Mapped[int | None] = mapped_column()
+    idempotency_key: Mapped[str | None] = mapped_column(String)
     project_id: Mapped[int] = mapped_column(ForeignKey("project_table.id"))
     project: Mapped["Project"] = relationship(back_populates="data")
 
@@ -62,7 +88,7 @@ class ProjectNotes(db.Model):
         DateTime(timezone=True), server_default=func.now()
     )
     updated_date: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=utcnow
     )
     note: Mapped[List[str]] = mapped_column(String)
     project_id: Mapped[int] = mapped_column(ForeignKey("project_table.id"))
@@ -70,3 +96,79 @@ class ProjectNotes(db.Model):
 
     def __repr__(self):
         return f"Note: {self.id}"
+
+
+class ProjectStats(db.Model):
+    __tablename__ = "project_stats_table"
+    __table_args__ = (
+        UniqueConstraint("project_id", "channel", name="uq_project_stats_channel"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    updated_date: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    channel: Mapped[str] = mapped_column(String, nullable=False)
+    count: Mapped[int] = mapped_column(default=0)
+    mean: Mapped[float] = mapped_column(Float, default=0.0)
+    m2: Mapped[float] = mapped_column(Float, default=0.0)
+    minimum: Mapped[float | None] = mapped_column(Float)
+    maximum: Mapped[float | None] = mapped_column(Float)
+    ewma_hour: Mapped[float | None] = mapped_column(Float)
+    ewma_day: Mapped[float | None] = mapped_column(Float)
+    last: Mapped[float | None] = mapped_column(Float)
+    last_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    alert: Mapped[str | None] = mapped_column(String)
+    project_id: Mapped[int] = mapped_column(ForeignKey("project_table.id"), index=True)
+    project: Mapped["Project"] = relationship(back_populates="stats")
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def add(
+        self, value: float, time: datetime, hour_tau: float, day_tau: float
+    ) -> None:
+        # Welford's online update, so a reading never rescans history.
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.last = value
+
+        # The averages decay by the time since the previous reading rather than
+        # per reading, so they span the same window however often a controller
+        # reports. A reading older than the newest one seen adds nothing.
+        elapsed = 0.0
+        if self.last_time is not None:
+            elapsed = max((time - self.last_time).total_seconds(), 0.0)
+        self.ewma_hour = decayed_mean(self.ewma_hour, value, elapsed, hour_tau)
+        self.ewma_day = decayed_mean(self.ewma_day, value, elapsed, day_tau)
+        if self.last_time is None or time > self.last_time:
+            self.last_time = time
+
+    def __repr__(self):
+        return f"Project Stats: {self.project_id} {self.channel}"
+
+
+def decayed_mean(mean: float | None, value: float, elapsed: float, tau: float) -> float:
+    if mean is None:
+        return value
+    return mean + (1 - math.exp(-elapsed / tau)) * (value - mean)
+
+
+@event.listens_for(Session, "after_flush")
+def touch_projects(session, flush_context):
+    # Readings and notes are part of a project's payload, so writing one
+    # bumps Project.updated for conditional GETs.
+    project_ids = {
+        obj.project_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, (ProjectData, ProjectNotes)) and obj.project_id
+    }
+    if project_ids:
+        session.connection().execute(
+            update(Project).where(Project.id.in_(project_ids)).values(updated=utcnow())
+        )
@@ -2,11 +2,38 @@ import json
 from datetime import datetime
 
 import pytz
-from flask_restful import Resource, fields, marshal, marshal_with, reqparse, request
+from flask import Response, current_app
+from flask_restful import (
+    Resource,
+    abort,
+    fields,
+    inputs,
+    marshal,
+    marshal_with,
+    reqparse,
+    request,
+)
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from app import db
+from app.conditional import cache_headers, not_modified
+from app.endpoints.profiles.model import Profile
 from app.endpoints.profiles.resource import ColorField
-from app.endpoints.projects.model import Project, ProjectData, ProjectNotes
+from app.endpoints.projects.dedup import (
+    reading_key,
+    recent_keys,
+    stored_keys,
+    utc_naive,
+)
+from app.endpoints.projects.model import (
+    Project,
+    ProjectData,
+    ProjectNotes,
+    ProjectStats,
+)
+from app.endpoints.projects.search import search_notes, search_terms
+from app.endpoints.projects.stats import update_stats
 
 
 class SensorDataJson(fields.Raw):
@@ -40,11 +67,33 @@ sensor_fields: dict = {
     "created_date": FormatDate(),
 }
 
+stats_fields: dict = {
+    "channel": fields.String,
+    "count": fields.Integer,
+    "mean": fields.Float,
+    "variance": fields.Float,
+    "min": fields.Float(attribute="minimum"),
+    "max": fields.Float(attribute="maximum"),
+    "ewma_hour": fields.Float,
+    "ewma_day": fields.Float,
+    "last": fields.Float,
+    "last_time": FormatDate(),
+    "alert": fields.String,
+    "updated_date": FormatDate(),
+}
+
 note_fields: dict = {
     "note": fields.String,
     "created_date": FormatDate(),
 }
 
+note_search_fields: dict = {
+    "id": fields.Integer,
+    "project_id": fields.Integer,
+    "note": fields.String,
+    "created_date": FormatDate(),
+}
+
 project_fields: dict = {
     "name": fields.String,
     "created": FormatDate(),
@@ -101,12 +150,33 @@ project_post_parser.add_argument("start")
 project_post_parser.add_argument("end")
 
 
+def project_versions(projects) -> list:
+    # The project payloads include the profile's name, so its change time is
+    # part of the version. A correlated subquery rather than a join, so the
+    # query's limit and offset still apply.
+    profile_updated = (
+        select(Profile.updated_date)
+        .where(Profile.id == Project.profile_id)
+        .scalar_subquery()
+    )
+    return projects.with_entities(Project.id, Project.updated, profile_updated).all()
+
+
 class ProjectResources(Resource):
     @staticmethod
-    def get(project_id=None) -> dict:
+    def get(project_id=None) -> Response | tuple:
         if project_id:
+            versions = project_versions(Project.query.filter_by(id=project_id))
+            if not versions:
+                abort(404)
+
+            headers = cache_headers(versions)
+            cached = not_modified(headers)
+            if cached:
+                return cached
+
             project = Project.query.get_or_404(project_id)
-            return marshal(project, project_fields)
+            return marshal(project, project_fields), 200, headers
         else:
             args = request.args.to_dict()
             limit = args.get("limit", 0)
@@ -123,9 +193,14 @@ class ProjectResources(Resource):
             if offset:
                 projects = projects.offset(offset)
 
+            headers = cache_headers(project_versions(projects), last_modified=False)
+            cached = not_modified(headers)
+            if cached:
+                return cached
+
             project = projects.all()
 
-            return marshal(project, project_list_fields)
+            return marshal(project, project_list_fields), 200, headers
 
     @staticmethod
     @marshal_with(project_fields)
@@ -177,22 +252,36 @@ class ProjectResources(Resource):
         return "", 204
 
 
+def project_active(project: Project) -> bool:
+    now = datetime.now()
+    base = now.strftime("%m/%d/%y")
+    start = datetime.strptime(f"{base} {project.start}", "%m/%d/%y %H:%M")
+    end = datetime.strptime(f"{base} {project.end}", "%m/%d/%y %H:%M")
+    return True if start < now < end else False
+
+
 class ProjectStatusResource(Resource):
     @staticmethod
     @marshal_with(status_fields)
     def get(project_id=None) -> dict:
         project = Project.query.get_or_404(project_id)
-        now = datetime.now()
-        base = datetime.now().strftime("%m/%d/%y")
-        start = datetime.strptime(f"{base} {project.start}", "%m/%d/%y %H:%M")
-        end = datetime.strptime(f"{base} {project.end}", "%m/%d/%y %H:%M")
         status_object: dict = {
-            "status": True if start < now < end else False,
+            "status": project_active(project),
             "colors": project.profile.colors,
         }
         return status_object
 
 
+class ProjectStatsResource(Resource):
+    @staticmethod
+    def get(project_id: int):
+        Project.query.get_or_404(project_id)
+        stats = ProjectStats.query.filter_by(project_id=project_id).order_by(
+            ProjectStats.channel
+        )
+        return marshal(stats.all(), stats_fields)
+
+
 sensor_post_parser = reqparse.RequestParser()
 sensor_post_parser.add_argument(
     "sensor_data",
@@ -203,11 +292,39 @@ sensor_post_parser.add_argument(
 )
 sensor_post_parser.add_argument(
     "project_id",
-    type=str,
+    type=int,
     required=True,
     location=["json"],
     help="The project_id parameter is required",
 )
+sensor_post_parser.add_argument(
+    "reading_time", type=inputs.datetime_from_iso8601, location=["json"]
+)
+sensor_post_parser.add_argument("sequence", type=int, location=["json"])
+sensor_post_parser.add_argument(
+    "Idempotency-Key", dest="idempotency_key", location=["headers"]
+)
+# Same precedence as the ingest server: a key in the body wins over the header.
+sensor_post_parser.add_argument(
+    "idempotency_key", type=str, location=["json"], store_missing=False
+)
+
+sensor_batch_parser = reqparse.RequestParser()
+sensor_batch_parser.add_argument(
+    "project_id",
+    type=int,
+    required=True,
+    location=["json"],
+    help="The project_id parameter is required",
+)
+sensor_batch_parser.add_argument(
+    "readings",
+    type=dict,
+    action="append",
+    required=True,
+    location=["json"],
+    help="The readings parameter must be a list of sensor_data objects",
+)
 
 
 class ProjectDataResources(Resource):
@@ -217,14 +334,34 @@ class ProjectDataResources(Resource):
         return marshal(sensor_data, sensor_fields)
 
     @staticmethod
-    @marshal_with(sensor_fields)
-    def post() -> ProjectData:
+    def post():
         args = sensor_post_parser.parse_args()
+        args["reading_time"] = utc_naive(args.get("reading_time"))
+        key = reading_key(
+            args.get("project_id"),
+            args.get("idempotency_key"),
+            args.get("reading_time"),
+            args.get("sequence"),
+        )
+
+        if key and key in recent_keys:
+            return {"message": "Duplicate reading", "duplicate": True}, 200
 
         sensor = ProjectData(**args)
-        db.session.add(sensor)
-        db.session.commit()
-        return sensor
+        try:
+            db.session.add(sensor)
+            update_stats(sensor.project_id, [sensor])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if not key:
+                raise
+            recent_keys.add(key)
+            return {"message": "Duplicate reading", "duplicate": True}, 200
+
+        if key:
+            recent_keys.add(key)
+        return marshal(sensor, sensor_fields)
 
     @staticmethod
     def patch(sensor_id: int):
@@ -248,6 +385,91 @@ class ProjectDataResources(Resource):
         return "", 204
 
 
+class ProjectDataBatchResources(Resource):
+    @staticmethod
+    def post():
+        args = sensor_batch_parser.parse_args()
+        project = Project.query.get_or_404(args.get("project_id"))
+
+        pending: list = []
+        duplicates: list = []
+        seen: set = set()
+        for index, reading in enumerate(args.get("readings")):
+            if not isinstance(reading.get("sensor_data"), str):
+                abort(400, message="Each reading requires a sensor_data string")
+
+            try:
+                reading_time = reading.get("reading_time")
+                if reading_time is not None:
+                    reading_time = utc_naive(inputs.datetime_from_iso8601(reading_time))
+                sequence = reading.get("sequence")
+                if sequence is not None:
+                    sequence = int(sequence)
+            except (TypeError, ValueError) as e:
+                abort(400, message=f"Invalid reading at index {index}: {str(e)}")
+
+            key = reading_key(
+                project.id, reading.get("idempotency_key"), reading_time, sequence
+            )
+            if key and (key in seen or key in recent_keys):
+                duplicates.append(index)
+                continue
+
+            if key:
+                seen.add(key)
+            columns: dict = {
+                "sensor_data": reading["sensor_data"],
+                "reading_time": reading_time,
+                "sequence": sequence,
+                "idempotency_key": reading.get("idempotency_key"),
+                "project_id": project.id,
+            }
+            pending.append((index, key, columns))
+
+        stored = stored_keys(
+            db.session, project.id, [key for _, key, _ in pending if key]
+        )
+        new_readings: list = []
+        for index, key, columns in pending:
+            if key in stored:
+                recent_keys.add(key)
+                duplicates.append(index)
+            else:
+                new_readings.append((index, columns))
+
+        sensors = [ProjectData(**columns) for _, columns in new_readings]
+        try:
+            db.session.add_all(sensors)
+            update_stats(project.id, sensors)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+            # A concurrent request stored some of these after the lookup, so
+            # insert one at a time and report the losers as duplicates.
+            sensors = []
+            for index, columns in new_readings:
+                sensor = ProjectData(**columns)
+                try:
+                    db.session.add(sensor)
+                    update_stats(project.id, [sensor])
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+                    duplicates.append(index)
+                else:
+                    sensors.append(sensor)
+
+        for _, key, _ in pending:
+            if key:
+                recent_keys.add(key)
+
+        return {
+            "inserted": marshal(sensors, sensor_fields),
+            "duplicates": sorted(duplicates),
+        }, 201
+
+
 notes_post_parser = reqparse.RequestParser()
 notes_post_parser.add_argument(
     "note",
@@ -289,15 +511,55 @@ class ProjectNoteResources(Resource):
         if note_obj:
             if "note" in args:
                 note_obj.note = args.get("note")
+            db.session.commit()
             return {"message": "Note updated successfully"}, 200
         else:
             return {"message": "Note not found"}, 404
 
     @staticmethod
     def delete(note_id: int):
-        note_obj = ProjectData.query.get_or_404(note_id)
+        note_obj = ProjectNotes.query.get_or_404(note_id)
 
         db.session.delete(note_obj)
         db.session.commit()
 
         return "The note was deleted", 204
+
+
+NOTES_SEARCH_MAX_LIMIT = 100
+
+notes_search_parser = reqparse.RequestParser()
+notes_search_parser.add_argument(
+    "q",
+    type=str,
+    required=True,
+    location=["args"],
+    help="The q parameter is required",
+)
+notes_search_parser.add_argument("project_id", type=int, location=["args"])
+notes_search_parser.add_argument(
+    "limit", type=inputs.positive, default=20, location=["args"]
+)
+notes_search_parser.add_argument(
+    "offset", type=inputs.natural, default=0, location=["args"]
+)
+
+
+class ProjectNoteSearchResource(Resource):
+    @staticmethod
+    def get():
+        args = notes_search_parser.parse_args()
+
+        if not search_terms(args.get("q")):
+            abort(400, message="The q parameter must contain a search term")
+
+        notes = search_notes(
+            args.get("q"), args.get("project_id"), current_app.config["NOTES_FTS"]
+        )
+
+        notes = notes.limit(min(args.get("limit"), NOTES_SEARCH_MAX_LIMIT))
+
+        if args.get("offset"):
+            notes = notes.offset(args.get("offset"))
+
+        return marshal(notes.all(), note_search_fields)
@@ -0,0 +1,96 @@
+from sqlalchemy import and_, column, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.endpoints.projects.model import ProjectNotes
+
+notes_fts = table("project_notes_fts", column("rowid"), column("rank"))
+
+# External-content FTS5 index over project_notes_tables.note, kept in sync by
+# triggers so every write path (including cascades) updates it. Migration
+# b7e4d2a9c630 creates the same objects on an upgraded database.
+NOTE_INDEX_DDL: list = [
+    """
+    CREATE VIRTUAL TABLE project_notes_fts USING fts5(
+        note, content='project_notes_tables', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_insert
+    AFTER INSERT ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_delete
+    AFTER DELETE ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(project_notes_fts, rowid, note)
+        VALUES ('delete', old.id, old.note);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_update
+    AFTER UPDATE OF note ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(project_notes_fts, rowid, note)
+        VALUES ('delete', old.id, old.note);
+        INSERT INTO project_notes_fts(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    "INSERT INTO project_notes_fts(project_notes_fts) VALUES ('rebuild')",
+]
+
+
+def init_note_index() -> bool:
+    if db.engine.dialect.name != "sqlite":
+        return False
+
+    with db.engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'project_notes_fts'"
+        ).first()
+        if exists:
+            return True
+
+        try:
+            for statement in NOTE_INDEX_DDL:
+                conn.exec_driver_sql(statement)
+        except OperationalError:
+            # SQLite built without FTS5.
+            conn.rollback()
+            return False
+
+    return True
+
+
+def search_terms(query: str) -> list:
+    return [term for term in query.split() if term]
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_notes(query: str, project_id: int | None, use_fts: bool):
+    terms = search_terms(query)
+
+    if use_fts:
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        notes = (
+            ProjectNotes.query.join(notes_fts, notes_fts.c.rowid == ProjectNotes.id)
+            .filter(text("project_notes_fts MATCH :match").bindparams(match=match))
+            .order_by(notes_fts.c.rank)
+        )
+    else:
+        notes = ProjectNotes.query.filter(
+            and_(
+                *[
+                    ProjectNotes.note.ilike(f"%{escape_like(term)}%", escape="\\")
+                    for term in terms
+                ]
+            )
+        ).order_by(ProjectNotes.created_date.desc())
+
+    if project_id:
+        notes = notes.filter(ProjectNotes.project_id == project_id)
+
+    return notes
@@ -0,0 +1,71 @@
+import json
+import math
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.database import db, utcnow
+from app.endpoints.projects.dedup import utc_naive
+from app.endpoints.projects.model import ProjectStats
+
+
+def sensor_channels(sensor_data: str) -> dict:
+    try:
+        reading = json.loads(sensor_data)
+    except (TypeError, ValueError):
+        return {}
+
+    if not isinstance(reading, dict):
+        return {}
+
+    return {
+        channel: float(value)
+        for channel, value in reading.items()
+        if isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    }
+
+
+def check_threshold(thresholds: dict, channel: str, value: float) -> str | None:
+    rule = thresholds.get(channel, {})
+
+    if "min" in rule and value < rule["min"]:
+        return "low"
+
+    if "max" in rule and value > rule["max"]:
+        return "high"
+
+    return None
+
+
+def update_stats(project_id: int, sensors: list) -> None:
+    apply_stats(db.session, current_app.config, project_id, sensors)
+
+
+def apply_stats(session, config, project_id: int, sensors: list) -> None:
+    # Adds to the caller's session, so the stats commit with the readings.
+    now = utcnow()
+    stats = {
+        stat.channel: stat
+        for stat in session.scalars(
+            select(ProjectStats).where(ProjectStats.project_id == project_id)
+        )
+    }
+
+    for sensor in sensors:
+        time = utc_naive(sensor.reading_time or sensor.created_date) or now
+        for channel, value in sensor_channels(sensor.sensor_data).items():
+            stat = stats.get(channel)
+
+            if stat is None:
+                stat = ProjectStats(
+                    project_id=project_id, channel=channel, count=0, mean=0.0, m2=0.0
+                )
+                session.add(stat)
+                stats[channel] = stat
+
+            stat.add(
+                value, time, config["STATS_EWMA_HOUR_TAU"], config["STATS_EWMA_DAY_TAU"]
+            )
+            stat.alert = check_threshold(config["STATS_THRESHOLDS"], channel, value)
@@ -0,0 +1,113 @@
+"""Measure how many concurrent controllers an ingest server can keep up with.
+
+Opens ``--connections`` client connections, each posting ``--requests``
+readings to ``/api/data`` back to back, and reports throughput, latency and
+failures. Run it once against the Flask app and once against the ASGI ingest
+server with the same settings to compare them::
+
+    python benchmarks/ingest_concurrency.py --url http://localhost:5000 -c 200
+    python benchmarks/ingest_concurrency.py --url http://localhost:8000 -c 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def read_response(reader) -> tuple:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+
+    version, status = status_line.decode().split()[:2]
+    headers: dict = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    keep_alive = version == "HTTP/1.1" and headers.get("connection") != "close"
+    return int(status), keep_alive
+
+
+async def controller(host: str, port: int, args, latencies: list, errors: list):
+    reader = writer = None
+    for sequence in range(args.requests):
+        body = json.dumps(
+            {
+                "project_id": args.project_id,
+                "sensor_data": json.dumps({"moisture": sequence % 100}),
+            }
+        ).encode()
+        request = (
+            f"POST /api/data HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode() + body
+
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), args.timeout
+                )
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                read_response(reader), args.timeout
+            )
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            continue
+
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors.append(str(status))
+        if not keep_alive:
+            writer.close()
+            writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def main(args) -> None:
+    url = urlsplit(args.url)
+    latencies: list = []
+    errors: list = []
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            controller(url.hostname, url.port or 80, args, latencies, errors)
+            for _ in range(args.connections)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"connections: {args.connections}")
+    print(f"completed:   {len(latencies)} in {elapsed:.2f}s")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+        print(f"latency p99: {p99 * 1000:.1f} ms")
+    print(f"errors:      {len(errors)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("-c", "--connections", type=int, default=100)
+    parser.add_argument("-n", "--requests", type=int, default=20)
+    parser.add_argument("--project-id", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,3 +1,4 @@
+import json
 import os
 
 from dotenv import find_dotenv, load_dotenv
@@ -14,3 +15,17 @@ class Config:
     ) or "sqlite:///" + os.path.join(basedir, "instance", "seedy.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     BUNDLE_ERRORS = True
+    # Time constants, in seconds, of the hourly and daily moving averages.
+    STATS_EWMA_HOUR_TAU = float(os.environ.get("STATS_EWMA_HOUR_TAU", 3600))
+    STATS_EWMA_DAY_TAU = float(os.environ.get("STATS_EWMA_DAY_TAU", 86400))
+    # {"moisture": {"min": 30, "max": 80}} flags readings outside the range.
+    STATS_THRESHOLDS = json.loads(os.environ.get("STATS_THRESHOLDS", "{}"))
+    DEDUP_WINDOW_SIZE = int(os.environ.get("DEDUP_WINDOW_SIZE", 10000))
+    # Optional ASGI ingest server (app/asgi.py).
+    ASYNC_DATABASE_URI = os.environ.get(
+        "ASYNC_DATABASE_URI"
+    ) or SQLALCHEMY_DATABASE_URI.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    ASYNC_WRITE_BATCH = int(os.environ.get("ASYNC_WRITE_BATCH", 500))
+    SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR") or os.path.join(
+        basedir, "instance", "snapshots"
+    )
@@ -0,0 +1,59 @@
+"""add project_stats_table
+
+Revision ID: 5c1d7e9a4b21
+Revises: 32e3b88229f0
+Create Date: 2026-10-19 17:05:12.418204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c1d7e9a4b21"
+down_revision = "32e3b88229f0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app/__init__.py runs db.create_all() on import, which creates new tables
+    # before the upgrade runs.
+    if "project_stats_table" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "project_stats_table",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            "updated_date",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.Column("minimum", sa.Float(), nullable=True),
+        sa.Column("maximum", sa.Float(), nullable=True),
+        sa.Column("ewma", sa.Float(), nullable=True),
+        sa.Column("last", sa.Float(), nullable=True),
+        sa.Column("alert", sa.String(), nullable=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project_table.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("project_id", "channel", name="uq_project_stats_channel"),
+    )
+    op.create_index(
+        op.f("ix_project_stats_table_project_id"),
+        "project_stats_table",
+        ["project_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_project_stats_table_project_id"), table_name="project_stats_table"
+    )
+    op.drop_table("project_stats_table")
@@ -0,0 +1,56 @@
+"""add reading dedup columns to project_data_table
+
+Revision ID: 8f3a2c6d1e47
+Revises: 5c1d7e9a4b21
+Create Date: 2026-10-19 17:12:40.731559
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f3a2c6d1e47"
+down_revision = "5c1d7e9a4b21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() on import already builds the full table on a new
+    # database, so only add what an existing one is missing.
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("project_data_table")}
+    constraints = {
+        constraint["name"]
+        for constraint in inspector.get_unique_constraints("project_data_table")
+    }
+
+    with op.batch_alter_table("project_data_table") as batch_op:
+        if "reading_time" not in columns:
+            batch_op.add_column(
+                sa.Column("reading_time", sa.DateTime(timezone=True), nullable=True)
+            )
+        if "sequence" not in columns:
+            batch_op.add_column(sa.Column("sequence", sa.Integer(), nullable=True))
+        if "idempotency_key" not in columns:
+            batch_op.add_column(
+                sa.Column("idempotency_key", sa.String(), nullable=True)
+            )
+        if "uq_project_data_idempotency_key" not in constraints:
+            batch_op.create_unique_constraint(
+                "uq_project_data_idempotency_key", ["project_id", "idempotency_key"]
+            )
+        if "uq_project_data_sequence" not in constraints:
+            batch_op.create_unique_constraint(
+                "uq_project_data_sequence",
+                ["project_id", "reading_time", "sequence"],
+            )
+
+
+def downgrade():
+    with op.batch_alter_table("project_data_table") as batch_op:
+        batch_op.drop_constraint("uq_project_data_sequence", type_="unique")
+        batch_op.drop_constraint("uq_project_data_idempotency_key", type_="unique")
+        batch_op.drop_column("idempotency_key")
+        batch_op.drop_column("sequence")
+        batch_op.drop_column("reading_time")
@@ -0,0 +1,77 @@
+"""add full-text index for project notes
+
+Revision ID: b7e4d2a9c630
+Revises: 8f3a2c6d1e47
+Create Date: 2026-10-19 18:41:07.215934
+
+"""
+import sqlalchemy as sa  # noqa: F401
+from alembic import op
+from sqlalchemy.exc import OperationalError
+
+# revision identifiers, used by Alembic.
+revision = "b7e4d2a9c630"
+down_revision = "8f3a2c6d1e47"
+branch_labels = None
+depends_on = None
+
+TRIGGERS: list = [
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_insert
+    AFTER INSERT ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_delete
+    AFTER DELETE ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(project_notes_fts, rowid, note)
+        VALUES ('delete', old.id, old.note);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_notes_fts_update
+    AFTER UPDATE OF note ON project_notes_tables BEGIN
+        INSERT INTO project_notes_fts(project_notes_fts, rowid, note)
+        VALUES ('delete', old.id, old.note);
+        INSERT INTO project_notes_fts(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    # init_note_index() on import may already have built the index.
+    exists = bind.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'project_notes_fts'"
+    ).first()
+    if not exists:
+        try:
+            op.execute(
+                """
+                CREATE VIRTUAL TABLE project_notes_fts USING fts5(
+                    note, content='project_notes_tables', content_rowid='id'
+                )
+                """
+            )
+        except OperationalError:
+            # SQLite built without FTS5; note search falls back to LIKE.
+            return
+
+    for statement in TRIGGERS:
+        op.execute(statement)
+    op.execute("INSERT INTO project_notes_fts(project_notes_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS project_notes_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS project_notes_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS project_notes_fts_insert")
+    op.execute("DROP TABLE IF EXISTS project_notes_fts")
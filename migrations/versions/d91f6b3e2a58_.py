@@ -0,0 +1,44 @@
+"""replace per-reading ewma with time-decayed hourly and daily averages
+
+Revision ID: d91f6b3e2a58
+Revises: b7e4d2a9c630
+Create Date: 2026-10-19 19:02:33.581640
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d91f6b3e2a58"
+down_revision = "b7e4d2a9c630"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() on import already builds the full table on a new
+    # database, so only change what an existing one is missing.
+    columns = {
+        column["name"]
+        for column in sa.inspect(op.get_bind()).get_columns("project_stats_table")
+    }
+
+    with op.batch_alter_table("project_stats_table") as batch_op:
+        if "ewma_hour" not in columns:
+            batch_op.add_column(sa.Column("ewma_hour", sa.Float(), nullable=True))
+        if "ewma_day" not in columns:
+            batch_op.add_column(sa.Column("ewma_day", sa.Float(), nullable=True))
+        if "last_time" not in columns:
+            batch_op.add_column(
+                sa.Column("last_time", sa.DateTime(timezone=True), nullable=True)
+            )
+        if "ewma" in columns:
+            batch_op.drop_column("ewma")
+
+
+def downgrade():
+    with op.batch_alter_table("project_stats_table") as batch_op:
+        batch_op.add_column(sa.Column("ewma", sa.Float(), nullable=True))
+        batch_op.drop_column("last_time")
+        batch_op.drop_column("ewma_day")
+        batch_op.drop_column("ewma_hour")
@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+import pytest
+
+# The app is configured when it is imported, so point it at a scratch
+# database first.
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URI"] = "sqlite:///" + os.path.join(_tmp.name, "test.db")
+os.environ["SNAPSHOT_DIR"] = os.path.join(_tmp.name, "snapshots")
+
+from app import app as flask_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.endpoints.projects.dedup import recent_keys  # noqa: E402
+from app.endpoints.projects.model import Project  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        yield flask_app
+        db.session.remove()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        recent_keys.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def project_id(app) -> int:
+    project = Project(name="Bed A", bed_id="1", start="2024-01-01", end="2024-12-31")
+    db.session.add(project)
+    db.session.commit()
+    return project.id
@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+
+from app.database import db
+from app.endpoints.projects import resource
+from app.endpoints.projects.dedup import reading_key, recent_keys, stored_keys
+from app.endpoints.projects.model import ProjectData
+
+READING_TIME = "2024-05-01T12:00:00Z"
+
+
+def reading(moisture: int, **fields) -> dict:
+    return {"sensor_data": json.dumps({"moisture": moisture}), **fields}
+
+
+def post_batch(client, project_id: int, readings: list):
+    return client.post(
+        "/api/data/batch", json={"project_id": project_id, "readings": readings}
+    )
+
+
+def test_retried_post_is_reported_as_duplicate(client, project_id):
+    body = {"project_id": project_id, **reading(10)}
+    headers = {"Idempotency-Key": "reading-1"}
+
+    response = client.post("/api/data", json=body, headers=headers)
+    assert response.status_code == 200
+    assert "duplicate" not in response.get_json()
+
+    response = client.post("/api/data", json=body, headers=headers)
+    assert response.get_json()["duplicate"] is True
+
+    # A retry that reaches a worker which has not seen the key is caught by the
+    # unique constraint instead.
+    recent_keys.clear()
+    response = client.post("/api/data", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["duplicate"] is True
+    assert ProjectData.query.count() == 1
+
+
+def test_retried_post_with_body_key_is_reported_as_duplicate(client, project_id):
+    body = {"project_id": project_id, "idempotency_key": "reading-1", **reading(10)}
+
+    client.post("/api/data", json=body)
+    response = client.post("/api/data", json=body)
+
+    assert response.get_json()["duplicate"] is True
+    assert ProjectData.query.count() == 1
+
+
+def test_batch_skips_keys_repeated_within_the_batch(client, project_id):
+    response = post_batch(
+        client,
+        project_id,
+        [
+            reading(10, idempotency_key="a"),
+            reading(11, idempotency_key="a"),
+            reading(12, reading_time=READING_TIME, sequence=1),
+            reading(13, reading_time=READING_TIME, sequence=1),
+            reading(14),
+        ],
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["duplicates"] == [1, 3]
+    assert len(response.get_json()["inserted"]) == 3
+
+
+def test_batch_retry_matches_either_key_form(client, project_id):
+    stored = reading(10, idempotency_key="a", reading_time=READING_TIME, sequence=1)
+    post_batch(client, project_id, [stored])
+    recent_keys.clear()
+
+    response = post_batch(
+        client,
+        project_id,
+        [
+            reading(10, reading_time=READING_TIME, sequence=1),
+            reading(10, idempotency_key="a"),
+        ],
+    )
+
+    assert response.get_json() == {"inserted": [], "duplicates": [0, 1]}
+    assert ProjectData.query.count() == 1
+
+    by_key = reading_key(project_id, "a", None, None)
+    by_sequence = reading_key(project_id, None, datetime(2024, 5, 1, 12), 1)
+    assert stored_keys(db.session, project_id, [by_sequence]) == {
+        by_key,
+        by_sequence,
+    }
+
+
+def test_batch_falls_back_to_single_inserts_on_conflict(
+    client, project_id, monkeypatch
+):
+    post_batch(client, project_id, [reading(10, idempotency_key="a")])
+    recent_keys.clear()
+
+    # As if a concurrent request stored "a" after the lookup.
+    monkeypatch.setattr(resource, "stored_keys", lambda *args: set())
+    response = post_batch(
+        client,
+        project_id,
+        [reading(10, idempotency_key="a"), reading(11, idempotency_key="b")],
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["duplicates"] == [0]
+    assert [item["sensor_data"] for item in response.get_json()["inserted"]] == [
+        {"moisture": 11}
+    ]
+    assert ProjectData.query.count() == 2
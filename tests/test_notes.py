@@ -0,0 +1,29 @@
+from app.database import db
+from app.endpoints.projects.model import ProjectNotes
+
+
+def add_notes(project_id: int, count: int) -> None:
+    db.session.add_all(
+        ProjectNotes(note=f"watered tray {index}", project_id=project_id)
+        for index in range(count)
+    )
+    db.session.commit()
+
+
+def test_search_rejects_unbounded_pages(client, project_id):
+    add_notes(project_id, 3)
+
+    for query in ("limit=0", "limit=-1", "offset=-1"):
+        response = client.get(f"/api/notes/search?q=watered&{query}")
+        assert response.status_code == 400, query
+
+
+def test_search_caps_limit(client, project_id):
+    add_notes(project_id, 105)
+
+    response = client.get("/api/notes/search?q=watered&limit=1000")
+    assert response.status_code == 200
+    assert len(response.get_json()) == 100
+
+    response = client.get("/api/notes/search?q=watered&limit=2&offset=104")
+    assert len(response.get_json()) == 1
@@ -0,0 +1,76 @@
+from app.database import db
+from app.endpoints.profiles.model import Profile
+from app.endpoints.projects.model import Project
+
+
+def add_projects():
+    profile = Profile(name="Tomato", colors="[]")
+    db.session.add(profile)
+    db.session.flush()
+    for name in ("Bed A", "Bed B", "Bed C"):
+        db.session.add(
+            Project(
+                name=name,
+                bed_id="1",
+                start="2024-01-01",
+                end="2024-12-31",
+                profile_id=profile.id if name == "Bed B" else None,
+            )
+        )
+    db.session.commit()
+
+
+def project_names(response) -> list:
+    return [project["name"] for project in response.get_json()]
+
+
+def test_list_projects_with_limit_and_offset(client):
+    add_projects()
+
+    response = client.get("/api/projects?limit=2")
+    assert response.status_code == 200
+    assert project_names(response) == ["Bed A", "Bed B"]
+
+    response = client.get("/api/projects?offset=1")
+    assert response.status_code == 200
+    assert project_names(response) == ["Bed B", "Bed C"]
+
+    response = client.get("/api/projects?limit=1&offset=1")
+    assert response.status_code == 200
+    assert project_names(response) == ["Bed B"]
+    assert response.headers["ETag"]
+
+
+def test_list_projects_page_is_conditional(client):
+    add_projects()
+
+    response = client.get("/api/projects?limit=1&offset=2")
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/api/projects?limit=1&offset=2", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = client.get("/api/projects?limit=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_list_projects_sends_no_last_modified(client):
+    add_projects()
+
+    detail = client.get(f"/api/projects/{Project.query.first().id}")
+    assert "Last-Modified" in detail.headers
+
+    response = client.get("/api/projects")
+    assert "Last-Modified" not in response.headers
+
+    db.session.delete(Project.query.filter_by(name="Bed C").one())
+    db.session.commit()
+
+    response = client.get(
+        "/api/projects",
+        headers={"If-Modified-Since": detail.headers["Last-Modified"]},
+    )
+    assert response.status_code == 200
+    assert project_names(response) == ["Bed A", "Bed B"]
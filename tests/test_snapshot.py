@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from app.database import db
+from app.endpoints.analytics import snapshot
+from app.endpoints.projects.model import ProjectData
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def snapshot_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "SNAPSHOT_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+def add_readings(project_id: int, values: list) -> None:
+    db.session.add_all(
+        ProjectData(project_id=project_id, sensor_data=json.dumps(value))
+        for value in values
+    )
+    db.session.commit()
+
+
+def query(client, channel: str) -> list:
+    response = client.get(f"/api/analytics/query?channel={channel}")
+    projects = response.get_json()["projects"].values()
+    return sorted(value for project in projects for value in project["values"])
+
+
+def test_build_writes_only_new_rows(client, project_id, snapshot_dir, monkeypatch):
+    monkeypatch.setattr(snapshot, "BATCH_SIZE", 2)
+    add_readings(project_id, [{"moisture": 1}, {"moisture": 2}, {"moisture": 3}])
+
+    response = client.post("/api/analytics/snapshot")
+    assert response.get_json()["exported"] == 3
+
+    project_dir = os.path.join(snapshot_dir, str(project_id))
+    first_segments = {
+        name: os.stat(os.path.join(project_dir, name, "time.npy")).st_mtime_ns
+        for name in os.listdir(project_dir)
+    }
+    assert len(first_segments) == 2
+
+    add_readings(project_id, [{"moisture": 4, "light": 9}])
+    response = client.post("/api/analytics/snapshot")
+    assert response.get_json()["exported"] == 1
+    assert response.get_json()["projects"][str(project_id)] == {
+        "rows": 4,
+        "channels": ["light", "moisture"],
+    }
+
+    for name, mtime in first_segments.items():
+        assert os.stat(os.path.join(project_dir, name, "time.npy")).st_mtime_ns == mtime
+    assert len(os.listdir(project_dir)) == 3
+
+    assert query(client, "moisture") == [1, 2, 3, 4]
+    assert query(client, "light") == [9]
+
+
+def test_interrupted_build_does_not_duplicate_rows(
+    client, project_id, snapshot_dir, monkeypatch
+):
+    monkeypatch.setattr(snapshot, "BATCH_SIZE", 2)
+    add_readings(project_id, [{"moisture": value} for value in range(5)])
+
+    write_manifest = snapshot.write_manifest
+    calls: list = []
+
+    def interrupt_second_write(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        write_manifest(*args)
+
+    monkeypatch.setattr(snapshot, "write_manifest", interrupt_second_write)
+    with pytest.raises(RuntimeError):
+        snapshot.build_snapshot(snapshot_dir)
+    monkeypatch.setattr(snapshot, "write_manifest", write_manifest)
+
+    assert query(client, "moisture") == [0, 1]
+
+    response = client.post("/api/analytics/snapshot")
+    assert response.get_json()["exported"] == 3
+    assert query(client, "moisture") == [0, 1, 2, 3, 4]
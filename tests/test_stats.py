@@ -0,0 +1,49 @@
+import json
+import math
+from datetime import datetime, timedelta
+
+
+def post_reading(client, project_id: int, moisture: float, reading_time: str):
+    return client.post(
+        "/api/data",
+        json={
+            "project_id": project_id,
+            "sensor_data": json.dumps({"moisture": moisture}),
+            "reading_time": reading_time,
+        },
+    )
+
+
+def moisture_stats(client, project_id: int) -> dict:
+    (stats,) = client.get(f"/api/projects/{project_id}/stats").get_json()
+    return stats
+
+
+def test_averages_decay_by_elapsed_time(client, project_id):
+    post_reading(client, project_id, 10, "2024-05-01T12:00:00Z")
+    post_reading(client, project_id, 20, "2024-05-01T13:00:00Z")
+
+    stats = moisture_stats(client, project_id)
+    assert stats["count"] == 2
+    assert math.isclose(stats["ewma_hour"], 10 + 10 * (1 - math.exp(-1)))
+    assert math.isclose(stats["ewma_day"], 10 + 10 * (1 - math.exp(-1 / 24)))
+
+
+def test_averages_do_not_depend_on_reporting_rate(client, project_id):
+    start = datetime(2024, 5, 1, 12)
+    post_reading(client, project_id, 10, f"{start.isoformat()}Z")
+    for minute in range(1, 61):
+        reading_time = start + timedelta(minutes=minute)
+        post_reading(client, project_id, 20, f"{reading_time.isoformat()}Z")
+
+    stats = moisture_stats(client, project_id)
+    assert math.isclose(stats["ewma_hour"], 10 + 10 * (1 - math.exp(-1)))
+
+
+def test_late_reading_does_not_move_averages(client, project_id):
+    post_reading(client, project_id, 10, "2024-05-01T12:00:00Z")
+    post_reading(client, project_id, 50, "2024-05-01T11:00:00Z")
+
+    stats = moisture_stats(client, project_id)
+    assert stats["ewma_hour"] == 10
+    assert stats["last"] == 50